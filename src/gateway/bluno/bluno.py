@@ -1,13 +1,14 @@
 # src/gateway/bluno.py
 """ Module to read from bluno devices via BLE """
 from __future__ import annotations
+from collections import deque
 from dataclasses import dataclass
 import json
 import logging
 import queue
 import threading
 import time
-from typing import Optional, Callable
+from typing import Deque, Optional, Callable, Tuple
 
 from bluepy.btle import (
     Peripheral,
@@ -17,8 +18,14 @@ from bluepy.btle import (
 )
 
 from gateway.configuration.config_loader import BlunoDevice
-from gateway.models import MQTTQueueItem, SQLiteDatabaseItem
+from gateway.models import MQTTQueueItem
 from gateway.sqlite.db import now_ms
+from gateway.sqlite.ingester import ReadingQueue
+
+try:
+    from orjson import loads as _json_loads  # parser en C, acepta str/bytes
+except ImportError:  # pragma: no cover - orjson es opcional
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
@@ -32,23 +39,63 @@ class _ConnState:
 
 
 class _LineDelegate(DefaultDelegate):
-    """Acumula notificaciones y entrega líneas terminadas en \\n vía callback (no bloqueante)."""
-    def __init__(self, name: str, on_line: Callable[[str], None]) -> None:
+    """Acumula notificaciones y entrega líneas terminadas en \\n vía callback (no bloqueante).
+
+    Usa un buffer fijo con índices head/tail en vez de `del buf[:n]`, que
+    memmove-a la cola restante en cada línea (O(N²) con tráfico BLE a ráfagas).
+    """
+
+    _INITIAL_BUF = 4096
+
+    def __init__(self, name: str, on_line: Callable[[bytes], None]) -> None:
         super().__init__()
         self._name = name
-        self._buf = bytearray()
+        self._buf = bytearray(self._INITIAL_BUF)
+        self._head = 0
+        self._tail = 0
         self._on_line = on_line
 
     def handleNotification(self, cHandle, data):  # noqa: N802
-        self._buf.extend(data)
-        while True:
-            nl = self._buf.find(b"\n")
-            if nl == -1:
-                break
-            line = self._buf[:nl].decode("utf-8", errors="ignore").strip()
-            del self._buf[: nl + 1]
-            if line:
-                self._on_line(line)
+        n = len(data)
+        # Crece doblando sólo si no cabe; nunca se desplaza la cola por línea
+        if self._tail + n > len(self._buf):
+            self._compact_or_grow(n)
+        self._buf[self._tail:self._tail + n] = data
+        self._tail += n
+
+        # Un solo pase en C sobre la región pendiente: emite todas las líneas
+        # completas de la ráfaga en vez de un find() por línea en Python.
+        # Sólo \n termina línea (splitlines cortaría también por un \r
+        # suelto, desincronizando _head del buffer); el \r de un \r\n lo
+        # elimina el strip.
+        region = bytes(memoryview(self._buf)[self._head:self._tail])
+        end = region.rfind(b"\n")
+        if end >= 0:
+            self._head += end + 1
+            for raw in region[:end].split(b"\n"):
+                # cero copias extra: el strip opera sobre bytes y el parseo
+                # JSON del worker acepta bytes directamente, sin pasar por str
+                line = raw.strip()
+                if line:
+                    self._on_line(line)
+
+        # Buffer vacío: rebobina índices sin mover bytes
+        if self._head == self._tail:
+            self._head = 0
+            self._tail = 0
+
+    def _compact_or_grow(self, incoming: int) -> None:
+        """Recoloca los bytes pendientes al inicio; dobla el buffer si aún no caben."""
+        pending = self._tail - self._head
+        if pending:
+            self._buf[0:pending] = self._buf[self._head:self._tail]
+        self._head = 0
+        self._tail = pending
+        size = len(self._buf)
+        while pending + incoming > size:
+            size *= 2
+        if size != len(self._buf):
+            self._buf.extend(bytearray(size - len(self._buf)))
 
 
 class BlunoWorker(threading.Thread):
@@ -62,8 +109,8 @@ class BlunoWorker(threading.Thread):
 
     def __init__(self, 
         device: BlunoDevice, 
-        mqtt_queue: queue.Queue[MQTTQueueItem], 
-        db_queue: queue.Queue[SQLiteDatabaseItem]
+        mqtt_queue: queue.SimpleQueue[MQTTQueueItem], 
+        db_queue: ReadingQueue
     ) -> None:
         super().__init__(daemon=True, name=f"bluno-{device.name}")
         # Config proveniente del YAML/loader
@@ -74,6 +121,14 @@ class BlunoWorker(threading.Thread):
         self.sensor_numeric_id = device.sensor_numeric_id
         self.parse = getattr(device, "parse", "raw")
         self.field_map = getattr(device, "field_map", {}) or {}
+        # field_map precompilado: resolvemos una vez el nombre crudo de cada
+        # campo conocido, en vez de renombrar el dict entero por frame
+        _rev = {v: k for k, v in self.field_map.items()}
+        self._k_temp = _rev.get("temp", "temp")
+        self._k_hum = _rev.get("hum", "hum")
+        self._k_pres = _rev.get("pres", "pres")
+        self._k_lux = _rev.get("lux", "lux")
+        self._k_delta_g = _rev.get("delta_g", "delta_g")
         self.tx_uuid = device.tx_uuid
         self.command_uuid = device.command_uuid
         self.password_ascii = getattr(device, "password_ascii", None)
@@ -81,6 +136,14 @@ class BlunoWorker(threading.Thread):
         self.reconnect_interval = int(getattr(device, "reconnect_interval", 5))
         self.mqtt_queue = mqtt_queue
         self.db_queue = db_queue
+        # Referencias pre-resueltas del hot path: un atributo de instancia
+        # evita el LOAD_GLOBAL + LOAD_ATTR por frame en _process_line
+        self._mqtt_put = mqtt_queue.put_nowait
+        self._db_put = db_queue.put_nowait
+        self._mqtt_item = MQTTQueueItem
+        self._now_ms = now_ms
+        # Procesador de frames especializado por dispositivo (ver método)
+        self._process_json = self._build_json_processor()
 
         logger.info("BlunoWorker[%s] creado para %s (%s)", self.device_name, self.address, self.sensor_id)
         logger.info("  sensor_type=%s sensor_numeric_id=%s", self.sensor_type, self.sensor_numeric_id)
@@ -94,20 +157,20 @@ class BlunoWorker(threading.Thread):
         self.stop_evt = threading.Event()
         self.state = _ConnState()
 
-        # Cola de líneas (ts_ms, line) y worker TX
-        self._q: "queue.Queue[tuple[int, str]]" = queue.Queue(maxsize=20)
+        # Cola de líneas (ts_ms, line) y worker TX. deque(maxlen) da el mismo
+        # drop-oldest que la Queue acotada pero sin mutex por put/get (SPSC
+        # bajo el GIL); el Event despierta al worker sin polling.
+        self._dq: Deque[Tuple[int, bytes]] = deque(maxlen=20)
+        self._wake = threading.Event()
         self._tx_thread = threading.Thread(target=self._tx_worker, daemon=True, name=f"TX-{self.name}")
         self._tx_thread_started = False
-        self._last_pub_ts = 0.0  # throttling de publicación
 
     # ---------- ciclo de vida ----------
     def stop(self) -> None:
         """Detiene el hilo y limpia recursos."""
         self.stop_evt.set()
-        try:
-            self._q.put_nowait((0, "__STOP__"))
-        except queue.Full:
-            pass
+        self._dq.append((0, b"__STOP__"))
+        self._wake.set()
         if self._tx_thread_started:
             self._tx_thread.join(timeout=2)
         self._cleanup()
@@ -224,17 +287,11 @@ class BlunoWorker(threading.Thread):
             self.state = _ConnState()
 
     # ---------- encolado rápido desde el callback ----------
-    def _enqueue_line(self, line: str) -> None:
-        ts = now_ms()
-        try:
-            self._q.put_nowait((ts, line))
-        except queue.Full:
-            # Si se llena, descartamos el más viejo para no bloquear
-            try:
-                _ = self._q.get_nowait()
-                self._q.put_nowait((ts, line))
-            except Exception:
-                pass
+    def _enqueue_line(self, line: bytes) -> None:
+        # append con maxlen descarta el más viejo automáticamente: sin el
+        # baile try/except Full + get_nowait + put_nowait de queue.Queue
+        self._dq.append((self._now_ms(), line))
+        self._wake.set()
 
     # ---------- worker que imprime/guarda ----------
     def _tx_worker(self) -> None:
@@ -244,48 +301,75 @@ class BlunoWorker(threading.Thread):
           - si no: imprime RAW
         """
         while not self.stop_evt.is_set():
-            try:
-                ts_ms, line = self._q.get(timeout=1.0)
-            except queue.Empty:
+            if not self._wake.wait(timeout=1.0):
                 continue
-            if line == "__STOP__":
-                break
-
-            # Parseo
-            if self.parse == "json":
-                try:
-                    obj = json.loads(line)              
-                    if self.field_map and isinstance(obj, dict):
-                        obj = {self.field_map.get(k, k): v for k, v in obj.items()}
-
-                    logger.debug("[%s] %s JSON -> %s", self.device_name, self.sensor_id, obj)
-                    self.mqtt_queue.put_nowait(
-                        MQTTQueueItem(
-                            sensor_id=self.sensor_id,
-                            sensor_type=self.sensor_type,
-                            sensor_numeric_id=self.sensor_numeric_id,
-                            temp=obj.get("temp", 0.0),
-                            hum=obj.get("hum", 0.0),
-                            pres=obj.get("pres", 0.0),
-                            ts_ms=now_ms(),
-                            lux=obj.get("lux"),
-                            delta_g=obj.get("delta_g"),
-                        )
-                    )
-
-                    self.db_queue.put_nowait(
-                        SQLiteDatabaseItem(
-                            sensor_id=self.sensor_id,
-                            temp=obj.get("temp", 0.0),
-                            hum=obj.get("hum", 0.0),
-                            pres=obj.get("pres", 0.0),
-                            ts_ms=now_ms(),
-                            lux=obj.get("lux"),
-                            delta_g=obj.get("delta_g"),
-                        )
-                    )   
-                except json.JSONDecodeError:
-                    logger.error("[%s] %s RAW -> %s", self.device_name, self.sensor_id, line)
-            else:
-                logger.debug("[%s] %s RAW -> %s", self.device_name, self.sensor_id, line)
+            self._wake.clear()
+            while self._dq:
+                ts_ms, line = self._dq.popleft()
+                if line == b"__STOP__":
+                    return
+                self._process_line(ts_ms, line)
+
+    def _process_line(self, ts_ms: int, line: bytes) -> None:
+        """Parsea una línea y la encola a MQTT y SQLite."""
+        # Parseo
+        if self.parse == "json":
+            try:
+                obj = _json_loads(line)
+                logger.debug("[%s] %s JSON -> %s", self.device_name, self.sensor_id, obj)
+                self._process_json(obj, ts_ms)
+            except ValueError:  # JSONDecodeError de json u orjson
+                logger.error("[%s] %s RAW -> %s", self.device_name, self.sensor_id, line)
+        else:
+            logger.debug("[%s] %s RAW -> %s", self.device_name, self.sensor_id, line)
+
+    def _build_json_processor(self) -> Callable[[dict, int], None]:
+        """Construye un closure especializado para los frames JSON del device.
+
+        Toda la config (ids, claves crudas, colas, constructores) queda
+        capturada como variable libre: el cuerpo por frame sólo hace
+        LOAD_DEREF + llamadas, sin un solo self.* ni global.
+        """
+        device_name = self.device_name
+        sensor_id = self.sensor_id
+        sensor_type = self.sensor_type
+        sensor_numeric_id = self.sensor_numeric_id
+        k_temp, k_hum, k_pres = self._k_temp, self._k_hum, self._k_pres
+        k_lux, k_delta_g = self._k_lux, self._k_delta_g
+        mqtt_put, db_put = self._mqtt_put, self._db_put
+        mqtt_item = self._mqtt_item
+
+        def process(obj: dict, ts: int) -> None:
+            # Lectura directa con las claves crudas precompiladas: sin
+            # dict-comp de renombrado ni .get sobre field_map por clave
+            temp = obj.get(k_temp, 0.0)
+            hum = obj.get(k_hum, 0.0)
+            pres = obj.get(k_pres, 0.0)
+            lux = obj.get(k_lux)
+            delta_g = obj.get(k_delta_g)
+            # ts viene sellado de _enqueue_line: ni un reloj más por frame
+
+            mqtt_put(
+                mqtt_item(
+                    sensor_id=sensor_id,
+                    sensor_type=sensor_type,
+                    sensor_numeric_id=sensor_numeric_id,
+                    temp=temp,
+                    hum=hum,
+                    pres=pres,
+                    ts_ms=ts,
+                    lux=lux,
+                    delta_g=delta_g,
+                )
+            )
+            # La cola de DB lleva tuplas (ts_ms, device, sensor_id, payload):
+            # la serialización a JSON queda en el ingester, por lote
+            payload = {"temp": temp, "hum": hum, "pres": pres}
+            if lux is not None:
+                payload["lux"] = lux
+            if delta_g is not None:
+                payload["delta_g"] = delta_g
+            db_put((ts, device_name, sensor_id, payload))
+
+        return process
 
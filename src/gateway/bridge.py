@@ -17,6 +17,14 @@ import serial
 # logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
 # --------------------------------------------------------------------------------------
 
+# Reloj monotónico para todos los deadlines/gaps: inmune a saltos de NTP y
+# más barato que gettimeofday en Linux
+_now = time.monotonic
+
+# Cache de patrones compilados de _expect: los call sites usan siempre los
+# mismos literales, no merece la pena recompilar en cada PING/AT
+_RX_CACHE: dict[Tuple[str, ...], List[re.Pattern]] = {}
+
 
 class ArduinoBridge:
     """
@@ -45,6 +53,9 @@ class ArduinoBridge:
     AT_MIN_TIMEOUT_S = 5.0   # mínimo para respuestas AT
     END_WAIT_MIN_S = 20.0    # mínimo para esperar OK/ERR tras END
 
+    # Prefijo estático del heartbeat, codificado una sola vez
+    _HEALTH_PREFIX = b"<<<HEALTH_TS>>>\r\n"
+
     def __init__(self,
                  port: str,
                  baud: int = 115200,
@@ -54,7 +65,11 @@ class ArduinoBridge:
         self.baud = baud
         self._timeout = float(timeout)
         self._ready_at: float = 0.0
-        self._cmd_q: "queue.Queue[Tuple[str, Any, queue.Queue]]" = queue.Queue(maxsize=100)
+        # Cola de comandos: deque + Event en vez de queue.Queue (dos mutex por
+        # put/get); el Lock sólo cubre append+set por si hay varios productores
+        self._cmd_dq: Deque[Tuple[str, Any, queue.Queue]] = deque()
+        self._cmd_evt = threading.Event()
+        self._cmd_lock = threading.Lock()
         self._running = True
         self._worker = threading.Thread(target=self._serial_worker, daemon=True, name="SERIAL-BRIDGE")
         self._last_io_ts: float = 0.0
@@ -79,7 +94,7 @@ class ArduinoBridge:
         ser = serial.Serial(
             port=self.port,
             baudrate=self.baud,
-            timeout=1,
+            timeout=self.READ_TIMEOUT_S,
             write_timeout=self.WRITE_TIMEOUT_S,
             rtscts=False, dsrdtr=False, xonxoff=False,
         )
@@ -99,7 +114,7 @@ class ArduinoBridge:
 
         self._ser = ser
         # pequeño warm-up para que el sketch imprima READY/banner
-        self._ready_at = time.time() + self.READY_WARMUP_S
+        self._ready_at = _now() + self.READY_WARMUP_S
 
     def _recover_serial(self) -> None:
         self._log.warning("Recuperando puerto serie…")
@@ -111,6 +126,10 @@ class ArduinoBridge:
                     pass
             time.sleep(0.3)
             self._open_serial()
+            # el check de warm-up por comando ya no existe: absorbe aquí el
+            # banner tras reabrir
+            time.sleep(max(0.0, self._ready_at - _now()))
+            self._drain_for(0.5)
         except Exception as e:
             self._log.error("Falla al reabrir serial: %s", e)
 
@@ -124,29 +143,56 @@ class ArduinoBridge:
         self._ser.write(data)
         self._ser.flush()
 
-    def _readline_until(self, deadline: float) -> Optional[str]:
-        """Lee una línea (\n) antes del deadline. Devuelve None si no hay línea completa."""
+    def _write_lines(self, lines: List[str]) -> None:
+        """Escribe varias líneas CRLF en un solo write + flush (el framing
+        por CRLF ya las delimita para el parser del sketch)."""
+        assert self._ser is not None
+        self._log.debug("SER => %r", lines)
+        self._ser.write(b"".join((s + "\r\n").encode("utf-8", errors="ignore") for s in lines))
+        self._ser.flush()
+
+    def _readline_until(self, deadline: float) -> Optional[bytes]:
+        """Lee una línea (\n) antes del deadline, sin CRLF final. Devuelve los
+        bytes crudos (el caller decodifica sólo si lo necesita) o None si no
+        hay línea completa."""
         assert self._ser is not None
         buf = bytearray()
-        while time.time() < deadline:
-            b = self._ser.read(1)
-            if b:
-                if b == b"\n":
-                    line = buf.decode("utf-8", "ignore").rstrip("\r")
-                    return line
-                buf += b
+        while True:
+            remaining = deadline - _now()
+            if remaining <= 0:
+                return None
+            # read_until bloquea en el kernel (select) hasta el primer byte o
+            # el timeout: sin polling. Si el deadline cae antes que el timeout
+            # base, lo acortamos para no esperar de más.
+            if remaining < self.READ_TIMEOUT_S:
+                self._ser.timeout = remaining
+                try:
+                    chunk = self._ser.read_until(b"\n")
+                finally:
+                    self._ser.timeout = self.READ_TIMEOUT_S
             else:
-                time.sleep(0.01)
-        return None
+                chunk = self._ser.read_until(b"\n")
+            if chunk:
+                buf += chunk
+                if buf.endswith(b"\n"):
+                    del buf[-1]
+                    if buf.endswith(b"\r"):
+                        del buf[-1]
+                    return bytes(buf)
 
     def _expect(self, patterns: List[str], timeout_s: float) -> Optional[str]:
         """Espera cualquier patrón (regex, case-insensitive) hasta timeout."""
-        end = time.time() + max(0.05, timeout_s)
-        rx = [re.compile(p, re.I) for p in patterns]
-        while time.time() < end:
-            line = self._readline_until(end)
-            if line is None:
+        end = _now() + max(0.05, timeout_s)
+        key = tuple(patterns)
+        rx = _RX_CACHE.get(key)
+        if rx is None:
+            rx = [re.compile(p, re.I) for p in patterns]
+            _RX_CACHE[key] = rx
+        while _now() < end:
+            raw = self._readline_until(end)
+            if raw is None:
                 continue
+            line = raw.decode("utf-8", "ignore")
             self._log.debug("SER <= %r", line)
             for r in rx:
                 if r.search(line):
@@ -155,20 +201,25 @@ class ArduinoBridge:
 
     def _drain_for(self, seconds: float) -> None:
         """Drena/lee por un ratito para tragarse banners."""
-        end = time.time() + seconds
-        while time.time() < end:
-            line = self._readline_until(end)
-            if not line:
+        end = _now() + seconds
+        while _now() < end:
+            raw = self._readline_until(end)
+            if not raw:
                 continue
-            self._log.debug("DRN <= %r", line)
+            self._log.debug("DRN <= %r", raw)
 
     # ----------------------------------------------------------------------------------
     # API pública (thread-safe, encolada)
     # ----------------------------------------------------------------------------------
+    def _submit(self, item: Tuple[str, Any, "queue.Queue"]) -> None:
+        with self._cmd_lock:
+            self._cmd_dq.append(item)
+            self._cmd_evt.set()
+
     def ping(self, timeout: float = 2.0) -> bool:
         resp_q: "queue.Queue[bool]" = queue.Queue()
         try:
-            self._cmd_q.put(("PING", None, resp_q), timeout=1.0)
+            self._submit(("PING", None, resp_q))
             return resp_q.get(timeout=timeout)
         except Exception:
             return False
@@ -176,7 +227,7 @@ class ArduinoBridge:
     def get_gps(self, timeout: float = 4.0) -> Optional[dict]:
         resp_q: "queue.Queue[Optional[dict]]" = queue.Queue()
         try:
-            self._cmd_q.put(("GPS", None, resp_q), timeout=1.0)
+            self._submit(("GPS", None, resp_q))
             return resp_q.get(timeout=timeout)
         except Exception:
             return None
@@ -184,7 +235,16 @@ class ArduinoBridge:
     def publish_lines(self, topic: str, payload: str, wait_ok: float = 30.0) -> bool:
         resp_q: "queue.Queue[bool]" = queue.Queue()
         try:
-            self._cmd_q.put(("PUBLISH", (topic, payload, float(wait_ok)), resp_q), timeout=1.0)
+            self._submit(("PUBLISH", (topic, payload, float(wait_ok)), resp_q))
+            return resp_q.get(timeout=wait_ok + 5.0)
+        except Exception:
+            return False
+
+    def publish_batch(self, items: List[Tuple[str, str]], wait_ok: float = 30.0) -> bool:
+        """Publica varios pares (topic, payload) en una sola escritura serie."""
+        resp_q: "queue.Queue[bool]" = queue.Queue()
+        try:
+            self._submit(("PUBLISH_BATCH", (list(items), float(wait_ok)), resp_q))
             return resp_q.get(timeout=wait_ok + 5.0)
         except Exception:
             return False
@@ -192,7 +252,7 @@ class ArduinoBridge:
     def send_at(self, cmd: str, read_timeout: float = 12.0) -> str:
         resp_q: "queue.Queue[str]" = queue.Queue()
         try:
-            self._cmd_q.put(("AT", (cmd, float(read_timeout)), resp_q), timeout=1.0)
+            self._submit(("AT", (cmd, float(read_timeout)), resp_q))
             return resp_q.get(timeout=read_timeout + 2.0)
         except Exception:
             return ""
@@ -200,7 +260,7 @@ class ArduinoBridge:
     def send_direct_command(self, cmd: str, read_timeout: float = 10.0) -> str:
         resp_q: "queue.Queue[str]" = queue.Queue()
         try:
-            self._cmd_q.put(("DIRECT", (cmd, float(read_timeout)), resp_q), timeout=1.0)
+            self._submit(("DIRECT", (cmd, float(read_timeout)), resp_q))
             return resp_q.get(timeout=read_timeout + 2.0)
         except Exception:
             return ""
@@ -209,7 +269,7 @@ class ArduinoBridge:
         """Envía el comando <<<HEALTH_TS>>> + timestamp para solicitar datos CPSI."""
         resp_q: "queue.Queue[str]" = queue.Queue()
         try:
-            self._cmd_q.put(("HEALTH", (timestamp, float(read_timeout)), resp_q), timeout=1.0)
+            self._submit(("HEALTH", (timestamp, float(read_timeout)), resp_q))
             return resp_q.get(timeout=read_timeout + 2.0)
         except Exception:
             return ""
@@ -220,7 +280,7 @@ class ArduinoBridge:
                 self._running = False
                 dummy_q: "queue.Queue[None]" = queue.Queue()
                 try:
-                    self._cmd_q.put(("__STOP__", None, dummy_q), timeout=0.5)
+                    self._submit(("__STOP__", None, dummy_q))
                 except Exception:
                     pass
                 self._worker.join(timeout=3.0)
@@ -237,75 +297,77 @@ class ArduinoBridge:
     # Worker
     # ----------------------------------------------------------------------------------
     def _serial_worker(self) -> None:
-        while self._running:
+        # Warm-up una sola vez al arrancar el worker (tragarse banners READY,
+        # etc.), en vez de comprobar _ready_at en cada comando
+        remaining = self._ready_at - _now()
+        if remaining > 0:
+            time.sleep(remaining)
             try:
-                cmd_type, data, response_queue = self._cmd_q.get(timeout=0.5)
-            except queue.Empty:
+                self._drain_for(0.5)
+            except Exception:
+                pass
+
+        while self._running:
+            if not self._cmd_evt.wait(timeout=0.5):
                 continue
+            self._cmd_evt.clear()
+            while self._cmd_dq:
+                cmd_type, data, response_queue = self._cmd_dq.popleft()
+                if cmd_type == "__STOP__":
+                    return
+                self._execute_command(cmd_type, data, response_queue)
+
+    def _execute_command(self, cmd_type: str, data: Any, response_queue: "queue.Queue") -> None:
+        # Gap por comando
+        now = _now()
+        gap = now - self._last_io_ts
+        need_gap = self.GAP_PUBLISH_S if cmd_type in ("PUBLISH", "PUBLISH_BATCH") else self.GAP_FAST_S
+        if gap < need_gap:
+            time.sleep(need_gap - gap)
+
+        # Ejecuta con un par de reintentos de puerto
+        for attempt in range(2):
+            try:
+                if cmd_type == "PING":
+                    response_queue.put(self._do_ping()); break
+                elif cmd_type == "GPS":
+                    response_queue.put(self._do_gps()); break
+                elif cmd_type == "PUBLISH":
+                    topic, payload, wait_ok = data  # type: ignore[misc]
+                    response_queue.put(self._do_publish_sync(str(topic), str(payload), float(wait_ok))); break
+                elif cmd_type == "PUBLISH_BATCH":
+                    items, wait_ok = data  # type: ignore[misc]
+                    response_queue.put(self._do_publish_batch(items, float(wait_ok))); break
+                elif cmd_type == "AT":
+                    at_cmd, rt = data  # type: ignore[misc]
+                    response_queue.put(self._do_at(str(at_cmd), float(rt))); break
+                elif cmd_type == "DIRECT":
+                    direct_cmd, rt = data  # type: ignore[misc]
+                    response_queue.put(self._do_direct_command(str(direct_cmd), float(rt))); break
+                elif cmd_type == "HEALTH":
+                    timestamp, rt = data  # type: ignore[misc]
+                    response_queue.put(self._do_health_command(int(timestamp), float(rt))); break
             except Exception as e:
-                self._log.error("Worker get error: %s", e)
-                continue
-
-            if cmd_type == "__STOP__":
-                break
-
-            # Warm-up inicial (tragarse banners READY, etc.)
-            if time.time() < self._ready_at:
-                time.sleep(max(0.0, self._ready_at - time.time()))
-                # purga
-                try:
-                    self._drain_for(0.5)
-                except Exception:
-                    pass
-
-            # Gap por comando
-            now = time.time()
-            gap = now - self._last_io_ts
-            need_gap = self.GAP_PUBLISH_S if cmd_type == "PUBLISH" else self.GAP_FAST_S
-            if gap < need_gap:
-                time.sleep(need_gap - gap)
-
-            # Ejecuta con un par de reintentos de puerto
-            for attempt in range(2):
-                try:
-                    if cmd_type == "PING":
-                        response_queue.put(self._do_ping()); break
-                    elif cmd_type == "GPS":
-                        response_queue.put(self._do_gps()); break
-                    elif cmd_type == "PUBLISH":
-                        topic, payload, wait_ok = data  # type: ignore[misc]
-                        response_queue.put(self._do_publish_sync(str(topic), str(payload), float(wait_ok))); break
-                    elif cmd_type == "AT":
-                        at_cmd, rt = data  # type: ignore[misc]
-                        response_queue.put(self._do_at(str(at_cmd), float(rt))); break
-                    elif cmd_type == "DIRECT":
-                        direct_cmd, rt = data  # type: ignore[misc]
-                        response_queue.put(self._do_direct_command(str(direct_cmd), float(rt))); break
-                    elif cmd_type == "HEALTH":
-                        timestamp, rt = data  # type: ignore[misc]
-                        response_queue.put(self._do_health_command(int(timestamp), float(rt))); break
-                except Exception as e:
-                    self._log.warning("Worker error (intent %d/2): %s", attempt + 1, e)
-                    if attempt == 0:
-                        self._recover_serial()
-                        time.sleep(0.5)
-                    else:
-                        # fallo final → respuesta vacía/falsa
-                        try:
-                            if cmd_type == "PING":
-                                response_queue.put(False)
-                            elif cmd_type == "GPS":
-                                response_queue.put(None)
-                            elif cmd_type == "PUBLISH":
-                                response_queue.put(False)
-                            elif cmd_type in ("AT", "DIRECT", "HEALTH"):
-                                response_queue.put("")
-                        except Exception:
-                            pass
-                        break
+                self._log.warning("Worker error (intent %d/2): %s", attempt + 1, e)
+                if attempt == 0:
+                    self._recover_serial()
+                    time.sleep(0.5)
+                else:
+                    # fallo final → respuesta vacía/falsa
+                    try:
+                        if cmd_type == "PING":
+                            response_queue.put(False)
+                        elif cmd_type == "GPS":
+                            response_queue.put(None)
+                        elif cmd_type in ("PUBLISH", "PUBLISH_BATCH"):
+                            response_queue.put(False)
+                        elif cmd_type in ("AT", "DIRECT", "HEALTH"):
+                            response_queue.put("")
+                    except Exception:
+                        pass
+                    break
 
-            self._cmd_q.task_done()
-            self._last_io_ts = time.time()
+        self._last_io_ts = _now()
 
     # ----------------------------------------------------------------------------------
     # Implementaciones
@@ -319,22 +381,35 @@ class ArduinoBridge:
 
     def _do_gps(self) -> Optional[dict]:
         self._write_line("<<<GPS?>>>")
-        # lee líneas hasta encontrar una JSON { ... }
-        end = time.time() + 4.0
-        text_chunks: Deque[str] = deque()
-        while time.time() < end:
-            line = self._readline_until(end)
-            if not line:
+        # Sigue la profundidad de llaves de forma incremental sobre cada línea
+        # nueva: una pasada lineal, sin re-join + rfind del buffer completo
+        end = _now() + 4.0
+        chunks: List[str] = []
+        total = 0       # caracteres ya acumulados en chunks
+        depth = 0
+        start = -1      # offset donde abrió el JSON
+        while _now() < end:
+            raw = self._readline_until(end)
+            if not raw:
                 continue
+            line = raw.decode("utf-8", "ignore")
             self._log.debug("SER <= %r", line)
-            text_chunks.append(line)
-            txt = "\n".join(text_chunks).strip()
-            i0, i1 = txt.rfind("{"), txt.rfind("}")
-            if i0 != -1 and i1 != -1 and i1 > i0:
-                try:
-                    return json.loads(txt[i0:i1 + 1])
-                except Exception:
-                    return None
+            chunks.append(line)
+            chunks.append("\n")
+            for i, ch in enumerate(line):
+                if ch == "{":
+                    if depth == 0:
+                        start = total + i
+                    depth += 1
+                elif ch == "}" and depth:
+                    depth -= 1
+                    if depth == 0:
+                        txt = "".join(chunks)
+                        try:
+                            return json.loads(txt[start:total + i + 1])
+                        except Exception:
+                            return None
+            total += len(line) + 1
         return None
 
     def _do_at(self, cmd: str, read_timeout: float) -> str:
@@ -342,70 +417,77 @@ class ArduinoBridge:
         # prompt laxo
         self._expect([r"\[send\]\s*comando AT", r"AT>", r".*"], timeout_s=1.2)
         self._write_line(cmd)
-        # respuesta con mínimo razonable
-        end = time.time() + max(self.AT_MIN_TIMEOUT_S, read_timeout)
-        lines: List[str] = []
-        last = time.time()
-        while time.time() < end:
-            line = self._readline_until(end)
-            if line is None:
+        # respuesta con mínimo razonable; acumulamos bytes crudos y
+        # decodificamos una sola vez al final
+        end = _now() + max(self.AT_MIN_TIMEOUT_S, read_timeout)
+        buf = bytearray()
+        last = _now()
+        while _now() < end:
+            raw = self._readline_until(end)
+            if raw is None:
                 # silencio breve: si ya hay líneas, corta tras 0.2s de calma
-                if lines and (time.time() - last) > 0.2:
+                if buf and (_now() - last) > 0.2:
                     break
                 continue
-            self._log.debug("AT <= %r", line)
-            lines.append(line)
-            last = time.time()
-        return "\n".join(lines)
+            self._log.debug("AT <= %r", raw)
+            buf += raw
+            buf += b"\n"
+            last = _now()
+        return bytes(buf[:-1]).decode("utf-8", "ignore") if buf else ""
 
     def _do_direct_command(self, cmd: str, read_timeout: float) -> str:
         self._write_line(cmd)
-        end = time.time() + max(8.0, read_timeout)
-        lines: List[str] = []
-        last = time.time()
-        while time.time() < end:
-            line = self._readline_until(end)
-            if line is None:
-                if lines and (time.time() - last) > 0.2:
+        end = _now() + max(8.0, read_timeout)
+        buf = bytearray()
+        last = _now()
+        while _now() < end:
+            raw = self._readline_until(end)
+            if raw is None:
+                if buf and (_now() - last) > 0.2:
                     break
                 continue
-            self._log.debug("CMD <= %r", line)
-            lines.append(line)
-            last = time.time()
-        return "\n".join(lines)
+            self._log.debug("CMD <= %r", raw)
+            buf += raw
+            buf += b"\n"
+            last = _now()
+        return bytes(buf[:-1]).decode("utf-8", "ignore") if buf else ""
 
     def _do_health_command(self, timestamp: int, read_timeout: float) -> str:
         """Implementa el protocolo <<<HEALTH_TS>>> + timestamp."""
-        self._write_line("<<<HEALTH_TS>>>")
-        time.sleep(0.05)  # pequeño delay para que el Arduino procese
-        self._write_line(str(timestamp))
-        
-        end = time.time() + max(8.0, read_timeout)
-        lines: List[str] = []
-        last = time.time()
-        while time.time() < end:
-            line = self._readline_until(end)
-            if line is None:
-                if lines and (time.time() - last) > 0.2:
+        # Prefijo pre-codificado + timestamp en un solo write: el framing por
+        # CRLF ya delimita ambas líneas para el sketch
+        assert self._ser is not None
+        self._log.debug("SER => <<<HEALTH_TS>>> %d", timestamp)
+        self._ser.write(self._HEALTH_PREFIX + str(timestamp).encode("ascii") + b"\r\n")
+        self._ser.flush()
+
+
+        end = _now() + max(8.0, read_timeout)
+        buf = bytearray()
+        last = _now()
+        while _now() < end:
+            raw = self._readline_until(end)
+            if raw is None:
+                if buf and (_now() - last) > 0.2:
                     break
                 continue
-            self._log.debug("HEALTH <= %r", line)
-            lines.append(line)
-            last = time.time()
-        return "\n".join(lines)
+            self._log.debug("HEALTH <= %r", raw)
+            buf += raw
+            buf += b"\n"
+            last = _now()
+        return bytes(buf[:-1]).decode("utf-8", "ignore") if buf else ""
 
     def _do_publish_sync(self, topic: str, payload: str, wait_ok: float) -> bool:
-        import re
-
-        # --- TOPIC ---
-        self._write_line("<<<TOPIC>>>");  
-        time.sleep(0.03)
-        self._write_line(topic);          
-        time.sleep(0.05)
-        self._write_line("<<<PAYLOAD>>>")
-        time.sleep(0.03)
-        self._write_line(payload);        
-        time.sleep(0.05)
-        self._write_line("<<<END>>>")
-     
+        # TOPIC/PAYLOAD/END en una sola escritura: 2 syscalls por publish en
+        # vez de 10 (5 write + 5 tcdrain) con sleeps intercalados
+        self._write_lines(["<<<TOPIC>>>", topic, "<<<PAYLOAD>>>", payload, "<<<END>>>"])
+        return True
+
+    def _do_publish_batch(self, items: List[Tuple[str, str]], wait_ok: float) -> bool:
+        # N secuencias TOPIC/PAYLOAD/END concatenadas en un único write+flush:
+        # amortiza las syscalls y el gap entre comandos sobre todo el lote
+        lines: List[str] = []
+        for topic, payload in items:
+            lines += ("<<<TOPIC>>>", topic, "<<<PAYLOAD>>>", payload, "<<<END>>>")
+        self._write_lines(lines)
         return True
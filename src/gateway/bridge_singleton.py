@@ -0,0 +1,26 @@
+""" Instancia compartida de ArduinoBridge para los comandos CLI. """
+from __future__ import annotations
+
+import atexit
+import threading
+from typing import Optional
+
+from gateway.bridge import ArduinoBridge
+
+_bridge: Optional[ArduinoBridge] = None
+_lock = threading.Lock()
+
+
+def get_bridge(port: str, baud: int = 115200) -> ArduinoBridge:
+    """Devuelve el ArduinoBridge compartido, creándolo la primera vez.
+
+    Mantener el puerto abierto entre comandos evita pagar el warm-up
+    (READY_WARMUP_S) y el reset de buffers en cada subcomando; el cierre
+    queda registrado en atexit.
+    """
+    global _bridge
+    with _lock:
+        if _bridge is None:
+            _bridge = ArduinoBridge(port, baud)
+            atexit.register(_bridge.close)
+        return _bridge
@@ -1,17 +1,19 @@
 """ Módulo para ejecutar el gateway. """
 import logging
 import signal
-from queue import Queue
+import threading
+import time
+from queue import SimpleQueue
 from typing import List, Sequence
 
 from gateway.bluno.bluno import BlunoWorker
 from gateway.bridge import ArduinoBridge
-from gateway.configuration.config_loader import BlunoDevice, Configuration, load_config
+from gateway.configuration.config_loader import Configuration, load_config
 from gateway.health.health_thread import HealthThread
-from gateway.models import MQTTQueueItem, SQLiteDatabaseItem
+from gateway.models import MQTTQueueItem
 from gateway.mqtt.publisher import MQTTThread
 from gateway.sqlite.db import SQLiteDatabase
-from gateway.sqlite.ingester import DBIngesterThread
+from gateway.sqlite.ingester import DBIngesterThread, ReadingQueue
 
 
 logger = logging.getLogger(__name__)
@@ -20,6 +22,7 @@ def handle_exit_signal(
     bluno_threads: List[BlunoWorker],
     mqtt_connection: MQTTThread,
     health_thread: HealthThread,
+    db_ingester_thread: DBIngesterThread,
     db: SQLiteDatabase,
 ):
     """Maneja la señal de salida para cerrar hilos y conexiones de forma ordenada."""
@@ -37,10 +40,19 @@ def handle_exit_signal(
                 if worker.is_alive():
                     worker.stop()
                     logger.info("hilo bluno detenido")
+            # Deadline compartido para todos los joins: los workers paran en
+            # paralelo, así que el peor caso es 2 s total y no 2 s por hilo
+            deadline = time.monotonic() + 2.0
             for worker in bluno_threads:
                 if worker.is_alive():
-                    worker.join(timeout=2.0)
+                    worker.join(timeout=max(0.0, deadline - time.monotonic()))
                     logger.info("hilo bluno joined")
+        # El ingester se para el último entre los hilos y antes de cerrar la
+        # conexión: su drenaje final persiste lo que quedara encolado
+        if db_ingester_thread and db_ingester_thread.is_alive():
+            db_ingester_thread.stop()
+            db_ingester_thread.join(timeout=5)
+            logger.info("hilo ingester detenido")
         if db:
             db.close()
     except RuntimeError:
@@ -52,8 +64,8 @@ def run():
     """Función principal que arranca el gateway."""
     cfg = load_config("config.yaml")
     logger.info("configuración cargada")
-    db_ingester_queue: Queue[MQTTQueueItem] = Queue()
-    mqtt_publisher_queue: Queue[MQTTQueueItem] = Queue()
+    db_ingester_queue = ReadingQueue()
+    mqtt_publisher_queue: SimpleQueue[MQTTQueueItem] = SimpleQueue()
     db = initialize_database(cfg.db.path)
     bridge = ArduinoBridge(cfg.gateway.serial_port, cfg.gateway.serial_baud)
 
@@ -74,12 +86,25 @@ def run():
     health_publisher.start()
     logger.info("health thread arrancado")
 
-    signal.pause()
+    # SIGTERM/SIGINT sólo marcan el evento: el cierre ordenado corre en el
+    # hilo principal, no dentro del handler (signal.pause() despertaba con
+    # cualquier señal, incluidas las que no son de salida)
+    shutdown_evt = threading.Event()
+
+    def _on_exit_signal(signum, _frame):
+        logger.warning("señal %d recibida", signum)
+        shutdown_evt.set()
+
+    signal.signal(signal.SIGTERM, _on_exit_signal)
+    signal.signal(signal.SIGINT, _on_exit_signal)
+
+    shutdown_evt.wait()
     logger.warning("señal de salida recibida, cerrando hilos...")
     handle_exit_signal(
         bluno_threads = bluno_threads,
         mqtt_connection=mqtt_publisher_thread,
         health_thread=health_publisher,
+        db_ingester_thread=db_ingester_thread,
         db=db
     )
 
@@ -92,26 +117,13 @@ def initialize_database(path: str) -> SQLiteDatabase:
 
 def initialize_bluno_workers(
         cfg: Configuration , 
-        mqtt_queue: Queue[MQTTQueueItem], 
-        db_queue: Queue[SQLiteDatabaseItem]
+        mqtt_queue: SimpleQueue[MQTTQueueItem], 
+        db_queue: ReadingQueue
     ) -> List[BlunoWorker]:
     """Inicializa y arranca los hilos BlunoWorker según la configuración."""
-    workers = []
-    for device_cfg in cfg.bluno.devices:
-        device = BlunoDevice(
-            name = device_cfg.name,
-            address = device_cfg.address,
-            sensor_id = device_cfg.sensor_id,
-            sensor_type = device_cfg.sensor_type,
-            sensor_numeric_id = device_cfg.sensor_numeric_id,
-            tx_uuid = device_cfg.tx_uuid,
-            command_uuid = device_cfg.command_uuid,
-            password_ascii = device_cfg.password_ascii,
-            uart_ascii = device_cfg.uart_ascii,
-            reconnect_interval = device_cfg.reconnect_interval,
-            parse = device_cfg.parse,
-            field_map = device_cfg.field_map,
-        )
-        worker = BlunoWorker(device, mqtt_queue, db_queue)
-        workers.append(worker)
-    return workers
+    # config_loader ya construye BlunoDevice completos: se pasan tal cual,
+    # sin re-copiar campo a campo
+    return [
+        BlunoWorker(device_cfg, mqtt_queue, db_queue)
+        for device_cfg in cfg.bluno.devices
+    ]
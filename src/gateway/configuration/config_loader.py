@@ -1,12 +1,19 @@
 # src/gateway/settings.py
 from __future__ import annotations
+import json
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import yaml
 
-@dataclass
+try:
+    from yaml import CSafeLoader as _YamlLoader  # LibYAML (C): 5-15x más rápido
+except ImportError:  # pragma: no cover - wheel de PyYAML sin libyaml
+    from yaml import SafeLoader as _YamlLoader
+
+
+@dataclass(slots=True)
 class Arduino4GConfiguration:
     """ Configuaración del puerto serie 4G sobre el arduino"""
     id: str = "1"
@@ -14,17 +21,17 @@ class Arduino4GConfiguration:
     serial_baud: int = 115200
 
 
-@dataclass
+@dataclass(slots=True)
 class BrokerConfiguration:
     topic_prefix: str = "fleet"
 
 
-@dataclass
+@dataclass(slots=True)
 class SQLiteDBConfiguration:
     path: str = "./data/gateway.db"
 
 
-@dataclass
+@dataclass(slots=True)
 class BlunoDevice:
     name: str
     address: str
@@ -40,7 +47,7 @@ class BlunoDevice:
     field_map: Optional[Dict[str, str]] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class BlunoConfiguration:
     tx_uuid: str
     command_uuid: str
@@ -50,7 +57,7 @@ class BlunoConfiguration:
     devices: List[BlunoDevice] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Configuration:
     gateway: Arduino4GConfiguration
     broker: BrokerConfiguration
@@ -61,10 +68,41 @@ class Configuration:
 
 
 def _ensure_str(d: Dict[str, Any], key: str, default: str) -> str:
-    v = d.get(key, default)
-    if not isinstance(v, str):
-        v = str(v)
-    return v
+    v = d.get(key)
+    if v is None:
+        return default
+    # type() is evita el MRO walk de isinstance para el caso común (str)
+    return v if type(v) is str else str(v)
+
+
+def _read_raw_config(p: Path) -> Dict[str, Any]:
+    """Lee el YAML crudo, con sidecar JSON (`<path>.cache.json`) keyed en mtime.
+
+    json.loads es un orden de magnitud más barato que YAML incluso con
+    LibYAML, y cada comando CLI vuelve a cargar la config. El sidecar se
+    escribe de forma atómica (tmp + rename) y se ignora si está desfasado.
+    """
+    sidecar = p.with_name(p.name + ".cache.json")
+    try:
+        if sidecar.stat().st_mtime >= p.stat().st_mtime:
+            return json.loads(sidecar.read_bytes()) or {}
+    except (OSError, ValueError):
+        pass
+
+    # read_bytes + decode en el propio loader: evita el paso str intermedio
+    data = yaml.load(p.read_bytes(), Loader=_YamlLoader) or {}
+    try:
+        tmp = sidecar.with_name(sidecar.name + ".tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        tmp.replace(sidecar)
+    except (OSError, TypeError):
+        pass
+    return data
+
+
+# Memoización por proceso: (mtime, Configuration) por ruta resuelta. run(),
+# health y pub cargan la misma config; las cargas repetidas son un dict lookup.
+_CONFIG_CACHE: Dict[str, tuple[float, Configuration]] = {}
 
 
 def load_config(path: str = "config.yaml") -> Configuration:
@@ -72,7 +110,13 @@ def load_config(path: str = "config.yaml") -> Configuration:
     if not p.exists():
         raise FileNotFoundError(f"Config no encontrado: {p.resolve()}")
 
-    data = yaml.safe_load(p.read_text(encoding="utf-8")) or {}
+    key = str(p.resolve())
+    mtime = p.stat().st_mtime
+    cached = _CONFIG_CACHE.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    data = _read_raw_config(p)
 
     gw = data.get("gateway", {})
     broker = data.get("broker", {})
@@ -124,7 +168,7 @@ def load_config(path: str = "config.yaml") -> Configuration:
             devices=devs_cfg,
         )
 
-    return Configuration(
+    cfg = Configuration(
         truck_id=_ensure_str(gw, "id", "truck-01"),
         gateway=gateway,
         broker=broker_cfg,
@@ -132,3 +176,5 @@ def load_config(path: str = "config.yaml") -> Configuration:
         sensors=sensors,
         bluno=bluno_cfg,
     )
+    _CONFIG_CACHE[key] = (mtime, cfg)
+    return cfg
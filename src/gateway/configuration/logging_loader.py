@@ -1,7 +1,28 @@
 """ Python logging configuration with colored output. """
 
 import logging
-from colorama import init as colorama_init, Fore, Style # type: ignore
+import sys
+import time
+
+if sys.platform == "win32":
+    from colorama import init as colorama_init, Fore, Style  # type: ignore
+else:
+    # En POSIX el terminal entiende ANSI directamente: sin colorama no hay
+    # stream wrapper interceptando cada write del handler
+    class _Fore:
+        BLUE = "\x1b[34m"
+        GREEN = "\x1b[32m"
+        YELLOW = "\x1b[33m"
+        RED = "\x1b[31m"
+        MAGENTA = "\x1b[35m"
+
+    class _Ansi:
+        RESET_ALL = "\x1b[0m"
+
+    Fore, Style = _Fore, _Ansi
+
+    def colorama_init(**_kwargs) -> None:
+        pass
 
 class ColorFormatter(logging.Formatter):
     """ Class to specify colors in log output based on severity level. """
@@ -13,14 +34,42 @@ class ColorFormatter(logging.Formatter):
         logging.CRITICAL: Fore.MAGENTA,
     }
 
+    def __init__(self) -> None:
+        # Formatter interno construido una sola vez (antes se creaba un
+        # logging.Formatter nuevo por registro) y levelnames ya coloreados
+        super().__init__(
+            "[%(levelname)s] %(asctime)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        # Dict levelno -> levelname ya coloreado, calculado una sola vez; el
+        # lookup exacto deja pasar niveles no estándar (25, 35…) con su
+        # nombre tal cual, sin etiquetarlos con el nivel estándar vecino
+        self._colored = {
+            lvl: f"{color}{logging.getLevelName(lvl)}{Style.RESET_ALL}"
+            for lvl, color in self.LEVEL_COLORS.items()
+        }
+        self._last_sec = -1
+        self._last_str = ""
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        # El formato sólo tiene resolución de segundos: cachear el strftime
+        # y reusarlo para todos los registros dentro del mismo segundo
+        sec = int(record.created)
+        if sec != self._last_sec:
+            self._last_str = time.strftime(
+                datefmt or self.datefmt or self.default_time_format,
+                time.localtime(sec),
+            )
+            self._last_sec = sec
+        return self._last_str
+
     def format(self, record: logging.LogRecord) -> str:
-        color = self.LEVEL_COLORS.get(record.levelno, "")
         orig_levelname = record.levelname
-        record.levelname = f"{color}{record.levelname}{Style.RESET_ALL}"
+        colored = self._colored.get(record.levelno)
+        if colored is not None:
+            record.levelname = colored
         try:
-            fmt = "[%(levelname)s] %(asctime)s - %(name)s - %(message)s"
-            formatter = logging.Formatter(fmt, datefmt="%Y-%m-%d %H:%M:%S")
-            return formatter.format(record)
+            return super().format(record)
         finally:
             record.levelname = orig_levelname
 
@@ -1,7 +1,10 @@
+import logging
 import threading
 import time
 from gateway.bridge import ArduinoBridge
 
+logger = logging.getLogger(__name__)
+
 
 class HealthThread(threading.Thread):
     """
@@ -14,12 +17,14 @@ class HealthThread(threading.Thread):
         self.bridge = bridge
         self.interval = interval
         self.running = True
+        self._stop_evt = threading.Event()
 
     def run(self):
         # Esperar un tiempo considerable al inicio para que todos los sistemas se estabilicen
         # Incluyendo la conexión de los sensores BLE y el bridge del Arduino
-        time.sleep(30)
-        
+        if self._stop_evt.wait(30):
+            return
+
         while self.running:
             try:
                 # Usar el nuevo protocolo <<<HEALTH_TS>>> + timestamp
@@ -29,21 +34,22 @@ class HealthThread(threading.Thread):
                 health_response = self.bridge.send_health_command(timestamp, read_timeout=10.0)
                 
                 if health_response.strip():
-                    print(f"Health command response: {health_response}")
-                    print(f"Health message with CPSI data sent successfully at timestamp {timestamp}")
+                    logger.debug("Health command response: %s", health_response)
+                    logger.info("Health message with CPSI data sent successfully at timestamp %d", timestamp)
                 else:
-                    print(f"Error: No response from health command at timestamp {timestamp}")
+                    logger.warning("No response from health command at timestamp %d", timestamp)
                 
-                # Esperar el intervalo o hasta que se detenga
-                for _ in range(self.interval):
-                    if not self.running:
-                        break
-                    time.sleep(1)
-                    
+                # Esperar el intervalo entero en un solo wait; stop() lo
+                # interrumpe al instante en vez de esperar el tick de 1 s
+                if self._stop_evt.wait(self.interval):
+                    break
+
             except Exception as e:
-                print(f"Error en health thread: {e}")
-                time.sleep(5)  # Esperar un poco antes de reintentar
+                logger.error("Error en health thread: %s", e)
+                if self._stop_evt.wait(5):  # Esperar un poco antes de reintentar
+                    break
 
     def stop(self):
         self.running = False
+        self._stop_evt.set()
         
\ No newline at end of file
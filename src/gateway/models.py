@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class MQTTQueueItem:
     """ Estructura para los datos MQTT con nueva estructura de topics """
     sensor_id: str
@@ -11,15 +11,4 @@ class MQTTQueueItem:
     pres: float
     ts_ms: int
     lux: float = None
-    delta_g: float = None
-
-@dataclass
-class SQLiteDatabaseItem:
-    """ Estructura para datos de base de datos """
-    sensor_id: str
-    temp: float
-    hum: float
-    pres: float
-    ts_ms: int
-    lux: float = None
     delta_g: float = None
\ No newline at end of file
@@ -4,21 +4,37 @@ import logging
 import queue
 import threading
 import time
-from typing import Any, Dict, Optional
 
 from gateway.bridge import ArduinoBridge
 from gateway.models import MQTTQueueItem
 from gateway.sqlite.db import now_ms
 
+try:
+    from orjson import dumps as _orjson_dumps  # C: ~5x más rápido que json
+
+    def _json_dumps(obj: dict) -> str:
+        return _orjson_dumps(obj).decode("utf-8")
+except ImportError:  # pragma: no cover - sin orjson instalado
+    def _json_dumps(obj: dict) -> str:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
 logger = logging.getLogger(__name__)
 
+# Centinela para despertar el hilo en stop() sin depender de timeouts
+_STOP_SENTINEL = object()
+
 class MQTTThread( threading.Thread ):
     """
     Hilo base para publicar los datos recibidos por los arduinos Bluno
     """
 
-    def __init__(self, 
-            mqtt_queue: queue.Queue[MQTTQueueItem], 
+    # Coalescencia: hasta BATCH_MAX items o BATCH_WINDOW_S de espera extra
+    # se publican en una sola escritura serie
+    BATCH_MAX = 8
+    BATCH_WINDOW_S = 0.05
+
+    def __init__(self,
+            mqtt_queue: queue.SimpleQueue[MQTTQueueItem], 
             bridge_at : ArduinoBridge,
             gateway_id: str = "1",
         ) -> None:
@@ -29,84 +45,102 @@ class MQTTThread( threading.Thread ):
         self.gateway_id = gateway_id
         self.running = True
 
+        # Topics y encoders de payload precalculados una sola vez: el topic
+        # por sensor es constante y el dispatch por tipo no cambia, así que
+        # el bucle caliente queda en dos lookups de dict
+        self._topics: dict[tuple[str, str], str] = {}
+        self._encoders = {
+            "door": self._door_payload,
+        }
+        self._default_encoder = self._amb_payload
+
+    @staticmethod
+    def _door_payload(item: MQTTQueueItem) -> dict:
+        # Sensor de puerta: lux y delta_g
+        return {
+            "ts": item.ts_ms,
+            "lux": round(item.lux, 2) if item.lux is not None else 0.0,
+            "delta_g": round(item.delta_g, 2) if item.delta_g is not None else 0.0,
+        }
+
+    @staticmethod
+    def _amb_payload(item: MQTTQueueItem) -> dict:
+        # Sensor de ambiente: temp, hum, pres
+        return {
+            "ts": item.ts_ms,
+            "temp": round(item.temp, 2),
+            "hum": round(item.hum, 2),
+            "pres": round(item.pres, 2),
+        }
+
     def run(self):
         """ Iniciar el hilo de conexion a mqtt"""
         while self.running:
             try:
-                item = self.mqtt_queue.get(timeout=1.0)
-                if item:
-                    logger.debug("Publicando item a mqtt: %s", item)
-                    
-                    # Nueva estructura de topic: fleet/<id_gateway>/<tipo_sensor>/<id_sensor>
-                    topic = f"fleet/{self.gateway_id}/{item.sensor_type}/{item.sensor_numeric_id}"
-                    
-                    # Nuevo payload según el tipo de sensor
-                    if item.sensor_type == "door":
-                        # Sensor de puerta: lux y delta_g
-                        payload_data = {
-                            "ts": item.ts_ms,
-                            "lux": round(item.lux, 2) if item.lux is not None else 0.0,
-                            "delta_g": round(item.delta_g, 2) if item.delta_g is not None else 0.0,
-                        }
-                    else:
-                        # Sensor de ambiente: temp, hum, pres
-                        payload_data = {
-                            "ts": item.ts_ms,
-                            "temp": round(item.temp, 2),
-                            "hum": round(item.hum, 2),
-                            "pres": round(item.pres, 2),
-                        }
-                    
-                    payload = json.dumps(
-                        payload_data,
-                        separators=(",", ":"),   # sin espacios
-                        ensure_ascii=False       # por si hay UTF-8 en IDs
-                    )
-                    
+                # get() bloqueante: sin despertares periódicos; stop()
+                # desbloquea encolando el centinela
+                item = self.mqtt_queue.get()
+                if item is _STOP_SENTINEL:
+                    break
+                if not item:
+                    continue
+
+                # Coalescer los items que lleguen en una ventana corta para
+                # amortizar la latencia del enlace serie/AT sobre el lote
+                batch = [item]
+                while len(batch) < self.BATCH_MAX:
+                    try:
+                        nxt = self.mqtt_queue.get(timeout=self.BATCH_WINDOW_S)
+                    except queue.Empty:
+                        break
+                    if nxt is _STOP_SENTINEL:
+                        self.running = False
+                        break
+                    if nxt:
+                        batch.append(nxt)
+
+                # Logging por item sólo en DEBUG: evaluar el guard una vez
+                # por lote, no por mensaje
+                debug_on = logger.isEnabledFor(logging.DEBUG)
+
+                publishes = []
+                for it in batch:
+                    if debug_on:
+                        logger.debug("Publicando item a mqtt: %s", it)
+
+                    # Estructura de topic: fleet/<id_gateway>/<tipo_sensor>/<id_sensor>
+                    key = (it.sensor_type, it.sensor_numeric_id)
+                    topic = self._topics.get(key)
+                    if topic is None:
+                        topic = f"fleet/{self.gateway_id}/{it.sensor_type}/{it.sensor_numeric_id}"
+                        self._topics[key] = topic
+
+                    payload_data = self._encoders.get(it.sensor_type, self._default_encoder)(it)
+
+                    payload = _json_dumps(payload_data)
+
                     # WORKAROUND: Añadir llave extra para compensar el truncamiento del firmware
                     payload = payload + "}"
-                    
-                    size_bytes = len(payload.encode("utf-8"))
-                    logger.info("payload bytes: %d, payload: %s", size_bytes, payload)
-                    logger.info("topic: %s", topic)
-                    
-                    self.bridge.publish_lines(topic, payload, wait_ok=20)
-                    self.mqtt_queue.task_done()
-                    logger.info("queue size: %d", self.mqtt_queue.qsize())
-            except queue.Empty:
-                continue
+
+                    if debug_on:
+                        # El payload es ASCII puro (claves/números): len == bytes
+                        logger.debug("payload bytes: %d, payload: %s", len(payload), payload)
+                        logger.debug("topic: %s", topic)
+
+                    publishes.append((topic, payload))
+
+                if len(publishes) == 1:
+                    self.bridge.publish_lines(publishes[0][0], publishes[0][1], wait_ok=20)
+                else:
+                    self.bridge.publish_batch(publishes, wait_ok=20)
+
+                if debug_on:
+                    logger.debug("queue size: %d", self.mqtt_queue.qsize())
             except Exception as e:
                 logger.error("Error en MQTTThread: %s", e)
                 time.sleep(1)  # Evitar bucles rápidos en caso de error
 
-    def make_topic(self, prefix: str, gateway_id: str, kind: str, sensor_id: str) -> str:
-        # p. ej. fleet/truck-01/telemetry/ambiente1
-        parts = [p for p in [prefix, gateway_id, kind, sensor_id] if p]
-        return "/".join(parts)
-
-
-    def telemetry_payload(
-        self,
-        gateway_id: str,
-        sensor_id: str,
-        fields: Dict[str, Any],
-        ts_ms: int,
-        gps: Optional[Dict[str, Any]] = None,
-        seq: Optional[int] = None,
-    ) -> Dict[str, Any]:
-        obj: Dict[str, Any] = {
-            "schema": "v1",
-            "gateway_id": gateway_id,
-            "sensor_id": sensor_id,
-            "ts": ts_ms,
-            "data": fields,
-        }
-        if gps:
-            obj["gps"] = gps
-        if seq is not None:
-            obj["seq"] = seq
-        return obj
-
     def stop(self):
         """ Detener el hilo de publicación a mqtt"""
         self.running = False
+        self.mqtt_queue.put(_STOP_SENTINEL)
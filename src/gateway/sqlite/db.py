@@ -2,42 +2,197 @@
 from __future__ import annotations
 import json
 import logging
+import threading
 import time
 import sqlite3
-from typing import Optional
+from typing import Iterable, Optional
+
+try:
+    from orjson import dumps as json_dumps  # C: ~5x más rápido que json; bytes
+except ImportError:  # pragma: no cover - sin orjson instalado
+    def json_dumps(obj: dict) -> bytes:
+        """Serializa un payload a JSON compacto (bytes UTF-8)."""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+try:
+    from msgpack import packb as _msgpack_packb, unpackb as _msgpack_unpackb
+except ImportError:  # pragma: no cover - sin msgpack instalado
+    _msgpack_packb = None
+    _msgpack_unpackb = None
 
 logger = logging.getLogger(__name__)
 
+# Primer byte del BLOB payload: versión del formato. \x01 = msgpack. El
+# fallback JSON no lleva prefijo (un objeto JSON empieza por "{", 0x7b, que
+# nunca colisiona con \x01), así que decode distingue ambos y un formato
+# futuro sólo necesita otro byte.
+_FMT_MSGPACK = b"\x01"
+
+
+def encode_payload(obj: dict) -> bytes:
+    """Serializa un payload de lectura a bytes para la columna BLOB:
+    msgpack con prefijo de versión (~mitad de tamaño que JSON para los dicts
+    de sensores y más rápido de codificar), o JSON compacto si msgpack no
+    está disponible."""
+    if _msgpack_packb is not None:
+        return _FMT_MSGPACK + _msgpack_packb(obj, use_bin_type=True)
+    return json_dumps(obj)
+
+
+def decode_payload(data: bytes) -> dict:
+    """Operación inversa de encode_payload, para los consumidores de la
+    base de datos."""
+    if data[:1] == _FMT_MSGPACK:
+        return _msgpack_unpackb(data[1:], raw=False)
+    return json.loads(data)
+
+# device/sensor_id tienen cardinalidad bajísima (un puñado de Blunos): se
+# internan en `sensors` y cada lectura guarda sólo el FK entero, en vez de
+# copiar ambos strings en cada fila del log
 SCHEMA = """
+CREATE TABLE IF NOT EXISTS sensors (
+  id        INTEGER PRIMARY KEY,
+  device    TEXT,
+  sensor_id TEXT,
+  UNIQUE(device, sensor_id)
+);
+
 CREATE TABLE IF NOT EXISTS readings (
-  id        INTEGER PRIMARY KEY AUTOINCREMENT,
+  id        INTEGER PRIMARY KEY,
   ts_ms     INTEGER NOT NULL,
+  sensor_fk INTEGER NOT NULL,
+  payload   BLOB
+);
+
+-- Camino de escritura sin índices secundarios: cada INSERT es un único
+-- insert en el B-tree del rowid (append puro, los ids crecen). Los índices
+-- de consulta se crean aparte, sobre copias/snapshots, no aquí. Los DROP
+-- limpian bases creadas con versiones anteriores del esquema.
+DROP INDEX IF EXISTS idx_readings_ts;
+DROP INDEX IF EXISTS idx_readings_sensor;
+"""
+
+# Migración desde el esquema anterior, donde readings copiaba device y
+# sensor_id como TEXT en cada fila. Todo en una transacción: renombrar la
+# tabla vieja, poblar sensors con los pares distintos y copiar las filas
+# resolviendo el FK (JOIN con IS para no perder filas con NULL). El DROP
+# final se lleva también los índices y la entrada de sqlite_sequence viejos.
+_MIGRATE_LEGACY = """
+BEGIN IMMEDIATE;
+
+ALTER TABLE readings RENAME TO readings_legacy;
+
+CREATE TABLE sensors (
+  id        INTEGER PRIMARY KEY,
   device    TEXT,
   sensor_id TEXT,
-  payload   TEXT
+  UNIQUE(device, sensor_id)
 );
 
-CREATE INDEX IF NOT EXISTS idx_readings_ts ON readings(ts_ms);
-CREATE INDEX IF NOT EXISTS idx_readings_sensor ON readings(sensor_id);
+CREATE TABLE readings (
+  id        INTEGER PRIMARY KEY,
+  ts_ms     INTEGER NOT NULL,
+  sensor_fk INTEGER NOT NULL,
+  payload   BLOB
+);
+
+INSERT OR IGNORE INTO sensors (device, sensor_id)
+  SELECT DISTINCT device, sensor_id FROM readings_legacy;
+
+INSERT INTO readings (id, ts_ms, sensor_fk, payload)
+  SELECT r.id, r.ts_ms, s.id, r.payload
+  FROM readings_legacy r
+  JOIN sensors s ON s.device IS r.device AND s.sensor_id IS r.sensor_id;
+
+DROP TABLE readings_legacy;
+
+COMMIT;
 """
 
+# Constante a nivel de módulo: la identidad estable del string permite que el
+# statement cache de sqlite3 reutilice el INSERT preparado entre llamadas
+_INSERT_SQL = "INSERT INTO readings (ts_ms, sensor_fk, payload) VALUES (?, ?, ?)"
+
+
+def _insert(conn: sqlite3.Connection, row: tuple, _sql: str = _INSERT_SQL):
+    """Inserta una fila. El SQL va ligado como argumento por defecto: la
+    llamada por fila queda en dos LOAD_FAST, sin lookup de global ni de
+    atributo en el hot path."""
+    return conn.execute(_sql, row)
+
+
+def _bind_rows(rows: Iterable[tuple], fk_of) -> Iterable[list]:
+    """Mapea (ts_ms, device, sensor_id, payload) -> [ts_ms, fk, payload]
+    reutilizando una única lista de 3 huecos: executemany liga los parámetros
+    de cada fila antes de pedir la siguiente, así que el mismo buffer puede
+    mutarse sin copiar — cero tuplas nuevas por fila en régimen estacionario."""
+    row = [0, 0, None]
+    for (t, d, s, p) in rows:
+        row[0] = t
+        row[1] = fk_of(d, s)
+        row[2] = p
+        yield row
+
+
+_time_ns = time.time_ns
+
+
 def now_ms() -> int:
     """Devuelve timestamp actual en ms."""
-    return int(time.time() * 1000)
+    # time_ns + división entera: sin el float intermedio de time.time()*1000
+    return _time_ns() // 1_000_000
 
 class SQLiteDatabase():
     """Clase para manejar la base de datos SQLite."""
+
+    # Reintentos ante SQLITE_BUSY al abrir un lote: backoff exponencial
+    # (50, 100, 200 ms) antes de rendirse
+    _BUSY_RETRIES = 3
+    _BUSY_BACKOFF_S = 0.05
+
     def __init__(self, path: str) -> None:
         logging.info("estableciendo conexión sqlite en %s", path)
         self.connection: Optional[sqlite3.Connection] = None
+        # Un solo escritor a la vez: el lock serializa el lote del ingester
+        # con las escrituras sueltas de store_reading
+        self._write_lock = threading.Lock()
+        # Cache (device, sensor_id) -> fk: tras el primer miss por sensor,
+        # internar es un dict lookup
+        self._sensor_cache: dict[tuple[str, str], int] = {}
 
     def connect(self, path: str) -> None:
         """ Conecta a la base de datos SQLite y crea tablas si no existen. """
-        self.connection = sqlite3.connect(path, timeout=2)
+        # check_same_thread=False: connect() corre en el hilo principal pero
+        # las escrituras llegan desde el hilo ingester (único escritor).
+        # isolation_level=None: autocommit; las transacciones de lote se
+        # abren/cierran explícitamente en store_readings_batch.
+        self.connection = sqlite3.connect(
+            path, timeout=2, check_same_thread=False, isolation_level=None
+        )
         cur = self.connection.cursor()
         if cur is not None:
+            # WAL: los lectores no bloquean al escritor y el commit cuesta un
+            # solo fdatasync; synchronous=NORMAL es seguro en WAL (pierde como
+            # mucho el último commit ante un corte, nunca corrompe)
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute("PRAGMA synchronous=NORMAL")
+            cur.execute("PRAGMA temp_store=MEMORY")
+            cur.execute("PRAGMA cache_size=-20000")       # ~20 MB de page cache
+            cur.execute("PRAGMA mmap_size=134217728")     # 128 MB
+            cur.execute("PRAGMA wal_autocheckpoint=1000")
+            # Bases creadas con el esquema anterior (device/sensor_id TEXT
+            # por fila): CREATE TABLE IF NOT EXISTS no las tocaría y todas
+            # las escrituras fallarían por la columna sensor_fk ausente, así
+            # que se migran aquí, antes de aplicar el esquema actual
+            legacy = cur.execute(
+                "SELECT COUNT(*) FROM pragma_table_info('readings') WHERE name = 'device'"
+            ).fetchone()[0]
+            if legacy:
+                n = cur.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
+                logger.warning("migrando %d lecturas al esquema con tabla sensors...", n)
+                cur.executescript(_MIGRATE_LEGACY)
+                logger.warning("migración completada")
             cur.executescript(SCHEMA)
-            self.connection.commit()
 
         cur.close()
         logging.warning("conexión sqlite establecida")
@@ -50,23 +205,89 @@ class SQLiteDatabase():
             logger.warning("conexión sqlite cerrada")
 
 
+    def maintenance(self) -> None:
+        """Mantenimiento periódico fuera del hot path: trunca el WAL (evita
+        que crezca entre autocheckpoints) y deja que SQLite refresque sus
+        estadísticas de planificación. Lo invoca el ingester cada ~60 s,
+        tras un flush, nunca por lectura."""
+        if self.connection is None:
+            return
+        with self._write_lock:
+            self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.connection.execute("PRAGMA optimize")
+
+    def _sensor_fk(self, device: str, sensor_id: str) -> int:
+        """Resuelve (device, sensor_id) a su id interno, creándolo si hace
+        falta. Sólo el primer encuentro por sensor toca la tabla sensors."""
+        key = (device, sensor_id)
+        fk = self._sensor_cache.get(key)
+        if fk is None:
+            conn = self.connection
+            conn.execute(
+                "INSERT OR IGNORE INTO sensors (device, sensor_id) VALUES (?, ?)", key
+            )
+            fk = conn.execute(
+                "SELECT id FROM sensors WHERE device = ? AND sensor_id = ?", key
+            ).fetchone()[0]
+            self._sensor_cache[key] = fk
+        return fk
+
     def store_reading(
         self,
         device: str,
         sensor_id: str,
-        payload: dict | str,
+        payload: dict | str | bytes,
     ) -> None:
         """Guarda una lectura de datos."""
 
         if self.connection is None:
             logger.error("no hay conexión sqlite, ignorando escritura de lectura")
             return
-        if not isinstance(payload, str):
-            payload = json.dumps(payload, ensure_ascii=False)
+        # La columna es BLOB: los bytes se ligan tal cual, sin el
+        # round-trip decode/encode por UTF-8
+        if not isinstance(payload, (str, bytes)):
+            payload = encode_payload(payload)
 
-        cur = self.connection.cursor()
-        cur.execute(
-            "INSERT INTO readings (ts_ms, device, sensor_id, payload) VALUES (?, ?, ?, ?)",
-            (now_ms(), device, sensor_id, payload),
-        )
-        self.connection.commit()
+        # connection.execute evita crear/descartar un cursor por fila; con
+        # isolation_level=None el INSERT se autocommitea
+        with self._write_lock:
+            _insert(self.connection, (now_ms(), self._sensor_fk(device, sensor_id), payload))
+
+    def store_readings_batch(self, rows: Iterable[tuple]) -> None:
+        """Guarda un lote de lecturas (ts_ms, device, sensor_id, payload) en
+        una sola transacción: el coste del fsync del commit se amortiza entre
+        todas las filas del lote. Acepta cualquier iterable (executemany lo
+        consume fila a fila)."""
+        if self.connection is None:
+            logger.error("no hay conexión sqlite, ignorando escritura de lote")
+            return
+        conn = self.connection
+        with self._write_lock:
+            # BEGIN IMMEDIATE toma el write-lock de SQLite al abrir la
+            # transacción: si hay contención el SQLITE_BUSY salta aquí, de
+            # inmediato y reintetable, en vez de quedar oculto tras el
+            # busy_timeout a mitad de lote. Sólo se reintenta el BEGIN:
+            # rows puede ser un generador y no es repetible.
+            attempt = 0
+            while True:
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    break
+                except sqlite3.OperationalError as e:
+                    attempt += 1
+                    if attempt > self._BUSY_RETRIES:
+                        raise
+                    delay = self._BUSY_BACKOFF_S * (1 << (attempt - 1))
+                    logger.warning(
+                        "sqlite ocupado al abrir lote (%s), reintento %d en %.2f s",
+                        e, attempt, delay,
+                    )
+                    time.sleep(delay)
+            try:
+                # El FK se resuelve fila a fila dentro de la transacción; con
+                # el cache caliente es un dict lookup por fila
+                conn.executemany(_INSERT_SQL, _bind_rows(rows, self._sensor_fk))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
@@ -1,16 +1,91 @@
 import logging
-import queue
 import threading
-from gateway.sqlite.db import SQLiteDatabase
+import time
+from collections import deque
+from typing import Any, Deque, Iterator, Tuple
+
+from gateway.sqlite.db import SQLiteDatabase, encode_payload
 
 logger = logging.getLogger(__name__)
 
+# Lectura en tránsito: (ts_ms, device, sensor_id, payload). El payload viaja
+# como dict y se serializa en el ingester, por lote, fuera del hilo BLE.
+Reading = Tuple[int, str, str, Any]
+
+
+class ReadingQueue:
+    """Cola acotada para lecturas: deque(maxlen) + Event, como la cola de
+    líneas del BlunoWorker. append/popleft son atómicos bajo el GIL, así que
+    ni put ni drain pagan el mutex+Condition de queue.Queue; el Event sólo
+    despierta al consumidor.
+
+    La capacidad es fija: si el escritor SQLite se queda atrás, el ring
+    descarta la lectura más vieja (política drop-oldest: en telemetría la
+    lectura fresca vale más que la más antigua sin persistir) en vez de
+    crecer sin techo de memoria. `dropped` cuenta los descartes."""
+
+    # Potencia de dos (16384): ~3 h de lecturas a 1,5/s con techo acotado
+    CAPACITY = 1 << 14
+
+    def __init__(self) -> None:
+        self._dq: Deque[Reading] = deque(maxlen=self.CAPACITY)
+        self._evt = threading.Event()
+        # Métrica de backpressure: descartes por overflow desde el arranque
+        self.dropped = 0
+
+    def put(self, item: Reading) -> None:
+        dq = self._dq
+        if len(dq) == self.CAPACITY:
+            # deque(maxlen) expulsa la cabeza en C al hacer append; aquí
+            # sólo se contabiliza (contador aproximado entre productores)
+            self.dropped += 1
+        dq.append(item)
+        self._evt.set()
+
+    # compat con la interfaz queue que usan los productores
+    put_nowait = put
+
+    def qsize(self) -> int:
+        return len(self._dq)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Bloquea hasta que haya items pendientes (True) o venza el timeout.
+        Sin timeout bloquea indefinidamente; wake() desbloquea sin items."""
+        if self._dq:
+            return True
+        if not self._evt.wait(timeout):
+            return False
+        self._evt.clear()
+        return True
+
+    def wake(self) -> None:
+        """Despierta al consumidor aunque no haya items (cierre ordenado)."""
+        self._evt.set()
+
+    def drain_iter(self, max_n: int) -> Iterator[Reading]:
+        """Saca hasta max_n items encolados; generador, no materializa el
+        lote en memoria."""
+        dq = self._dq
+        for _ in range(max_n):
+            if not dq:
+                return
+            yield dq.popleft()
+
+
 class DBIngesterThread(threading.Thread):
     """
     Hilo base para ingerir datos en la base de datos SQLite
     """
 
-    def __init__(self, db_queue: queue.Queue, database: SQLiteDatabase) -> None:
+    # Group commit: tamaño máximo de lote por transacción y ventana corta de
+    # acumulación tras el primer item, para amortizar aún más cada fsync sin
+    # alargar la ventana de durabilidad más de unos ms
+    BATCH_MAX = 512
+    FLUSH_WINDOW_S = 0.010
+    # Cada cuánto truncar el WAL y refrescar estadísticas (fuera del flush)
+    MAINT_INTERVAL_S = 60.0
+
+    def __init__(self, db_queue: ReadingQueue, database: SQLiteDatabase) -> None:
         super().__init__(daemon=True)
         self.stop_event = threading.Event()
         self.db_queue = db_queue
@@ -18,15 +93,61 @@ class DBIngesterThread(threading.Thread):
 
     def run(self) -> None:
         """ Iniciar el hilo de ingesta a la base de datos SQLite"""
+        next_maint = time.monotonic() + self.MAINT_INTERVAL_S
         while not self.stop_event.is_set():
-            try:
-                item = self.db_queue.get(timeout=1.0)
-                if item:
-                    logger.debug("ingestando item a la base de datos SQLite: %s", item)
-                    self.db_queue.task_done()
-            except queue.Empty:
+            # Bloqueo indefinido: cero despertares en vacío; stop() hace
+            # wake() para desbloquear al instante
+            self.db_queue.wait()
+            if self.stop_event.is_set():
+                break
+            # Drenar lo ya encolado: un solo commit por lote en vez de un
+            # fsync por lectura
+            # Ventana de group commit: dejar llegar rezagados antes de abrir
+            # la transacción (stop_event.wait la corta al instante en cierre)
+            if self.db_queue.qsize() < self.BATCH_MAX:
+                self.stop_event.wait(self.FLUSH_WINDOW_S)
+
+            pending = self.db_queue.qsize()
+            if not pending:
                 continue
 
+            # executemany acepta cualquier iterable: el generador serializa y
+            # entrega fila a fila, sin materializar el lote entero en memoria
+            rows = (
+                (t, d, s, p if isinstance(p, (str, bytes)) else encode_payload(p))
+                for (t, d, s, p) in self.db_queue.drain_iter(self.BATCH_MAX)
+            )
+            # isEnabledFor evita hasta el min() y la construcción del
+            # LogRecord cuando DEBUG está apagado (el caso normal en campo)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("ingestando ~%d lecturas en SQLite", min(pending, self.BATCH_MAX))
+            try:
+                self.db.store_readings_batch(rows)
+            except Exception as e:
+                logger.error("error ingiriendo lote en SQLite: %s", e)
+
+            # Mantenimiento periódico tras el flush, nunca en medio de uno
+            if time.monotonic() >= next_maint:
+                next_maint = time.monotonic() + self.MAINT_INTERVAL_S
+                try:
+                    self.db.maintenance()
+                except Exception as e:
+                    logger.warning("error en mantenimiento sqlite: %s", e)
+
+        # Drenaje final: lo que quedara encolado al llegar stop() se persiste
+        # antes de salir, para no perder las últimas lecturas en cada cierre
+        while self.db_queue.qsize():
+            rows = (
+                (t, d, s, p if isinstance(p, (str, bytes)) else encode_payload(p))
+                for (t, d, s, p) in self.db_queue.drain_iter(self.BATCH_MAX)
+            )
+            try:
+                self.db.store_readings_batch(rows)
+            except Exception as e:
+                logger.error("error en el drenaje final a SQLite: %s", e)
+                break
+
     def stop(self) -> None:
         """ Detener el hilo de ingesta a la base de datos SQLite"""
         self.stop_event.set()
+        self.db_queue.wake()